@@ -0,0 +1,344 @@
+"""
+Load generator for the Flask web app.
+
+Runs N virtual players concurrently (asyncio), each playing full sessions the way the
+browser client does: /api/new_game -> many /api/fill_cell -> /api/hint -> /api/check_game,
+keeping the session cookie between requests. Reports throughput and p50/p95/p99 latency
+per route and per difficulty.
+
+Usage (from the repository root):
+    # Start gunicorn the same way the Dockerfile does and load it
+    python benchmarks/load_test.py --start-server --workers 2 --players 20 --duration 60
+
+    # Or load an already running server. Every finished game records a score, so this
+    # fills that server's leaderboard with fake players; don't point it at production.
+    python benchmarks/load_test.py --url http://127.0.0.1:7860 --players 50 --sessions 3
+
+Only the standard library is used, so it runs anywhere the app's requirements are installed.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from sudoku_bot.game_logic.sudoku import solve_sudoku, SIDE
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+
+
+# --- Minimal asyncio HTTP/1.1 client ---
+
+class HTTPClient:
+    """One virtual browser: a (re)usable connection plus a cookie jar."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.cookies = {}
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._writer = None
+
+    async def request(self, method, path, body=None):
+        """Sends a request and returns (status, parsed JSON or None)."""
+        payload = json.dumps(body).encode() if body is not None else b''
+        headers = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+            f'Content-Length: {len(payload)}',
+        ]
+        if body is not None:
+            headers.append('Content-Type: application/json')
+        if self.cookies:
+            headers.append('Cookie: ' + '; '.join(f'{k}={v}' for k, v in self.cookies.items()))
+        raw = ('\r\n'.join(headers) + '\r\n\r\n').encode() + payload
+
+        for attempt in range(2):
+            if self._writer is None:
+                await self._connect()
+            try:
+                self._writer.write(raw)
+                await self._writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The server closed a kept-alive connection; retry once on a fresh one
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self):
+        status_line = await self._reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self._reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip()
+            if name == 'set-cookie':
+                cookie_name, _, cookie_value = value.split(';', 1)[0].partition('=')
+                self.cookies[cookie_name.strip()] = cookie_value.strip()
+            else:
+                headers[name] = value
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        else:
+            body = await self._reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        try:
+            return status, json.loads(body) if body else None
+        except ValueError:
+            return status, None
+
+
+# --- Statistics ---
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)        # route -> [seconds]
+        self.by_difficulty = defaultdict(list)    # (route, difficulty) -> [seconds]
+        self.errors = defaultdict(int)            # route -> count
+        self.sessions = defaultdict(int)          # difficulty -> completed sessions
+
+    def add(self, route, difficulty, seconds, ok):
+        self.latencies[route].append(seconds)
+        self.by_difficulty[(route, difficulty)].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def total_requests(self):
+        return sum(len(v) for v in self.latencies.values())
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+def summarize(latencies, elapsed):
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'rps': len(values) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(values, 50) * 1000,
+        'p95_ms': percentile(values, 95) * 1000,
+        'p99_ms': percentile(values, 99) * 1000,
+        'max_ms': (values[-1] * 1000) if values else 0.0,
+    }
+
+
+# --- Virtual player ---
+
+async def timed(client, stats, route, difficulty, method, path, body=None):
+    start = time.perf_counter()
+    try:
+        status, data = await client.request(method, path, body)
+    except (ConnectionError, OSError, asyncio.IncompleteReadError):
+        stats.add(route, difficulty, time.perf_counter() - start, False)
+        return None
+    stats.add(route, difficulty, time.perf_counter() - start, status == 200)
+    return data if status == 200 else None
+
+
+async def play_session(client, stats, difficulty, args):
+    """One full game, roughly as a person in the browser would play it."""
+    data = await timed(client, stats, 'new_game', difficulty, 'POST', '/api/new_game', {'difficulty': difficulty})
+    if not data:
+        return
+    puzzle = data['puzzle_board']
+    solution = [row[:] for row in puzzle]
+    # Solve in a thread so a slow solve doesn't stall the other players' timings
+    await asyncio.to_thread(solve_sudoku, solution)
+
+    empties = [(r, c) for r in range(SIDE) for c in range(SIDE) if puzzle[r][c] == 0]
+    random.shuffle(empties)
+    hint_at = len(empties) // 2
+
+    for i, (row, col) in enumerate(empties):
+        if i == hint_at:
+            await timed(client, stats, 'hint', difficulty, 'GET', '/api/hint')
+        if random.random() < args.mistake_rate:
+            # A wrong guess, corrected later in the session
+            wrong = random.choice([n for n in range(1, SIDE + 1) if n != solution[row][col]])
+            await timed(client, stats, 'fill_cell', difficulty, 'POST', '/api/fill_cell',
+                        {'row': row, 'col': col, 'num': wrong})
+            await think(args)
+        await timed(client, stats, 'fill_cell', difficulty, 'POST', '/api/fill_cell',
+                    {'row': row, 'col': col, 'num': solution[row][col]})
+        await think(args)
+
+    await timed(client, stats, 'check_game', difficulty, 'GET', '/api/check_game')
+    stats.sessions[difficulty] += 1
+
+
+async def think(args):
+    if args.think_time > 0:
+        await asyncio.sleep(random.uniform(0, 2 * args.think_time))
+
+
+async def player(host, port, stats, args, deadline):
+    client = HTTPClient(host, port)
+    try:
+        sessions = 0
+        while (time.monotonic() < deadline) if deadline else (sessions < args.sessions):
+            await play_session(client, stats, random.choice(args.difficulties), args)
+            sessions += 1
+    finally:
+        await client.close()
+
+
+async def run_load(host, port, args):
+    stats = Stats()
+    deadline = time.monotonic() + args.duration if args.duration else None
+    start = time.perf_counter()
+    await asyncio.gather(*(player(host, port, stats, args, deadline) for _ in range(args.players)))
+    return stats, time.perf_counter() - start
+
+
+# --- Server management ---
+
+def wait_for_server(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def start_server(port, workers, db_path, preload=True):
+    # Same worker setup as the Dockerfile (gthread, so SSE streams don't block a whole worker)
+    cmd = [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--worker-class', 'gthread', '--threads', '4',
+           '--bind', f'127.0.0.1:{port}']
+    if preload:
+        cmd.append('--preload')
+    cmd.append('web_app.app:create_app()')
+    # Scores from the virtual players go to a throwaway database, not the real leaderboard
+    env = {**os.environ, 'SUDOKU_DB_PATH': db_path}
+    return subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+# --- Report ---
+
+def print_report(stats, elapsed, args):
+    print(f"\nPlayers: {args.players}, elapsed: {elapsed:.1f}s, requests: {stats.total_requests()}, "
+          f"throughput: {stats.total_requests() / elapsed:.1f} req/s")
+    print("Completed sessions: " + ', '.join(f"{d}={n}" for d, n in sorted(stats.sessions.items())))
+
+    header = f"{'route':<12} {'difficulty':<10} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}"
+    print('\n' + header)
+    print('-' * len(header))
+    for route in sorted(stats.latencies):
+        rows = [('all', stats.latencies[route])]
+        rows += [(d, stats.by_difficulty[(route, d)]) for d in DIFFICULTIES if stats.by_difficulty.get((route, d))]
+        for difficulty, latencies in rows:
+            s = summarize(latencies, elapsed)
+            errors = stats.errors[route] if difficulty == 'all' else ''
+            print(f"{route:<12} {difficulty:<10} {s['count']:>7} {s['rps']:>8.1f} {s['p50_ms']:>8.1f} "
+                  f"{s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['max_ms']:>8.1f} {errors:>7}")
+
+
+def report_json(stats, elapsed, args):
+    return {
+        'players': args.players,
+        'elapsed_s': elapsed,
+        'requests': stats.total_requests(),
+        'throughput_rps': stats.total_requests() / elapsed,
+        'sessions': dict(stats.sessions),
+        'routes': {
+            route: {
+                'all': summarize(latencies, elapsed),
+                'errors': stats.errors[route],
+                'by_difficulty': {d: summarize(stats.by_difficulty[(route, d)], elapsed)
+                                  for d in DIFFICULTIES if stats.by_difficulty.get((route, d))},
+            }
+            for route, latencies in stats.latencies.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent Sudoku players against the web app.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000',
+                        help="Base URL of the server to load. Without --start-server, the fake scores are "
+                             "written to that server's database.")
+    parser.add_argument('--start-server', action='store_true', help="Start gunicorn locally on the --url port first.")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers when using --start-server (Dockerfile uses 2).")
+    parser.add_argument('--no-preload', action='store_true', help="Start gunicorn without --preload.")
+    parser.add_argument('--players', type=int, default=10, help="Number of concurrent virtual players.")
+    parser.add_argument('--sessions', type=int, default=1, help="Games each player plays (ignored with --duration).")
+    parser.add_argument('--duration', type=float, default=0, help="Keep starting new games until this many seconds have passed.")
+    parser.add_argument('--difficulties', nargs='+', default=DIFFICULTIES, choices=DIFFICULTIES)
+    parser.add_argument('--think-time', type=float, default=0.05, help="Mean pause between moves, in seconds.")
+    parser.add_argument('--mistake-rate', type=float, default=0.1, help="Fraction of cells first filled with a wrong number.")
+    parser.add_argument('--json', metavar='PATH', help="Also write the results as JSON (for before/after comparisons).")
+    args = parser.parse_args()
+
+    parsed = urllib.parse.urlsplit(args.url)
+    host, port = parsed.hostname, parsed.port or 80
+
+    server = None
+    db_dir = None
+    if args.start_server:
+        db_dir = tempfile.TemporaryDirectory(prefix='sudoku-load-')
+        server = start_server(port, args.workers, os.path.join(db_dir.name, 'scores.db'), preload=not args.no_preload)
+    try:
+        if not wait_for_server(args.url + '/'):
+            sys.exit(f"Server at {args.url} did not become ready.")
+        stats, elapsed = asyncio.run(run_load(host, port, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            db_dir.cleanup()
+
+    print_report(stats, elapsed, args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report_json(stats, elapsed, args), f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Cold-start benchmark for the web app.
+
+Measures, each in fresh processes:
+  * import time of `web_app.app` (what every gunicorn worker pays without --preload),
+  * time to build the app with create_app(),
+  * time-to-first-request: from launching gunicorn until /api/ready answers, followed by
+    the latency of the first GET / and the first /api/new_game per difficulty,
+with and without gunicorn's --preload.
+
+Usage (from the repository root):
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import web_app.app; "
+    "print(time.perf_counter() - t)"
+)
+CREATE_APP_SNIPPET = (
+    "import time; import web_app.app as m; t = time.perf_counter(); m.create_app(); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def fresh_db_env(db_dir):
+    """Environment pointing the app at a new, empty scores database inside `db_dir`."""
+    fd, db_path = tempfile.mkstemp(suffix='.db', dir=db_dir)
+    os.close(fd) # SQLite treats the empty file as a new database
+    return {**os.environ, 'SUDOKU_DB_PATH': db_path}
+
+
+def run_snippet(snippet, env):
+    out = subprocess.run([sys.executable, '-c', snippet], cwd=REPO_ROOT, env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def timed_request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+
+def time_to_first_request(workers, preload, difficulties, env):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    # Same worker setup as the Dockerfile
+    cmd = [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--worker-class', 'gthread', '--threads', '4',
+           '--bind', f'127.0.0.1:{port}']
+    if preload:
+        cmd.append('--preload')
+    cmd.append('web_app.app:create_app()')
+
+    start = time.perf_counter()
+    server = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(base + '/api/ready', timeout=2) as resp:
+                    if resp.status == 200:
+                        break
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError("gunicorn exited before becoming ready")
+                time.sleep(0.01)
+        result = {'ready_s': time.perf_counter() - start, 'first_index_s': timed_request(base + '/')}
+        for difficulty in difficulties:
+            result[f'first_new_game_{difficulty}_s'] = timed_request(base + '/api/new_game', {'difficulty': difficulty})
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(name, values):
+    print(f"{name:<36} median {statistics.median(values) * 1000:8.1f} ms   "
+          f"min {min(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-request of the web app.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--difficulties', nargs='+', default=['easy', 'medium'],
+                        help="Difficulties for the first /api/new_game ('hard' is slow without a snapshot).")
+    parser.add_argument('--json', metavar='PATH', help="Also write the raw results as JSON.")
+    args = parser.parse_args()
+
+    # Every run starts on its own empty database (as a fresh deploy would) instead of the real one
+    with tempfile.TemporaryDirectory(prefix='sudoku-startup-') as db_dir:
+        results = {
+            'import_s': [run_snippet(IMPORT_SNIPPET, fresh_db_env(db_dir)) for _ in range(args.runs)],
+            'create_app_s': [run_snippet(CREATE_APP_SNIPPET, fresh_db_env(db_dir)) for _ in range(args.runs)],
+        }
+        for preload in (False, True):
+            label = 'preload' if preload else 'no_preload'
+            runs = [time_to_first_request(args.workers, preload, args.difficulties, fresh_db_env(db_dir))
+                    for _ in range(args.runs)]
+            for key in runs[0]:
+                results[f'{label}.{key}'] = [run[key] for run in runs]
+
+    for name, values in results.items():
+        summarize(name, values)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
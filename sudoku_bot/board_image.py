@@ -0,0 +1,146 @@
+"""
+Renders Sudoku boards as PNG images for the Telegram bot.
+
+Digits are drawn once into small tiles (one set for the puzzle's given numbers, one for the
+user's entries) and boards are composed by pasting those tiles onto a pre-drawn grid. Rendered
+PNGs are cached by the packed board state, and once Telegram has stored an image we keep its
+file_id so sending the same state again costs neither rendering nor an upload.
+"""
+import io
+from collections import OrderedDict
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    from .game_logic.sudoku import SIDE, BASE
+except ImportError:
+    # Imported as a top-level module when the bot is run from inside sudoku_bot/
+    from game_logic.sudoku import SIDE, BASE
+
+CELL_SIZE = 48      # Pixels per cell
+THIN_LINE = 1       # Line between cells
+THICK_LINE = 3      # Line between 3x3 boxes and around the board
+FONT_SIZE = 30
+
+BACKGROUND_COLOR = (255, 255, 255)
+GIVEN_BACKGROUND_COLOR = (232, 234, 237)
+LINE_COLOR = (40, 40, 40)
+GIVEN_COLOR = (20, 20, 20)
+USER_COLOR = (26, 115, 232)
+
+PNG_CACHE_SIZE = 256
+FILE_ID_CACHE_SIZE = 1024
+
+# Packed board keys use '0' for an empty cell, '1'-'9' for given numbers and
+# 'a'-'i' for numbers entered by the user (so the key also says how to draw each cell).
+_USER_DIGITS = 'abcdefghi'
+
+
+def _line_width(index):
+    return THICK_LINE if index % BASE == 0 else THIN_LINE
+
+
+# Pixel offset of each cell's top-left corner (same for rows and columns)
+_OFFSETS = []
+_pos = 0
+for _i in range(SIDE):
+    _pos += _line_width(_i)
+    _OFFSETS.append(_pos)
+    _pos += CELL_SIZE
+IMAGE_SIZE = _pos + THICK_LINE
+
+
+def board_key(board: list[list[int]], original_puzzle: list[list[int]] = None) -> str:
+    """Packs a board (and which cells are givens) into an 81-character cache key."""
+    chars = []
+    for r in range(SIDE):
+        for c in range(SIDE):
+            num = board[r][c]
+            if num == 0:
+                chars.append('0')
+            elif original_puzzle and original_puzzle[r][c] != 0:
+                chars.append(str(num))
+            else:
+                chars.append(_USER_DIGITS[num - 1])
+    return ''.join(chars)
+
+
+@lru_cache(maxsize=None)
+def _load_font():
+    for name in ("DejaVuSans-Bold.ttf", "DejaVuSans.ttf", "Arial.ttf"):
+        try:
+            return ImageFont.truetype(name, FONT_SIZE)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=FONT_SIZE) # Pillow >= 10.1
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _draw_tile(text, color, background):
+    tile = Image.new("RGB", (CELL_SIZE, CELL_SIZE), background)
+    if text:
+        draw = ImageDraw.Draw(tile)
+        draw.text((CELL_SIZE / 2, CELL_SIZE / 2), text, fill=color, font=_load_font(), anchor="mm")
+    return tile
+
+
+@lru_cache(maxsize=None)
+def _tiles():
+    """Pre-rendered cell tiles, keyed by the packed-key character they represent."""
+    tiles = {'0': _draw_tile('', None, BACKGROUND_COLOR)}
+    for num in range(1, SIDE + 1):
+        tiles[str(num)] = _draw_tile(str(num), GIVEN_COLOR, GIVEN_BACKGROUND_COLOR)
+        tiles[_USER_DIGITS[num - 1]] = _draw_tile(str(num), USER_COLOR, BACKGROUND_COLOR)
+    return tiles
+
+
+@lru_cache(maxsize=None)
+def _grid_background():
+    """The empty board with all grid lines drawn."""
+    image = Image.new("RGB", (IMAGE_SIZE, IMAGE_SIZE), LINE_COLOR)
+    blank = _tiles()['0']
+    for y in _OFFSETS:
+        for x in _OFFSETS:
+            image.paste(blank, (x, y))
+    return image
+
+
+@lru_cache(maxsize=PNG_CACHE_SIZE)
+def render_png(key: str) -> bytes:
+    """Renders a packed board key (see board_key) to PNG bytes."""
+    tiles = _tiles()
+    image = _grid_background().copy()
+    for i, ch in enumerate(key):
+        if ch != '0':
+            image.paste(tiles[ch], (_OFFSETS[i % SIDE], _OFFSETS[i // SIDE]))
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", compress_level=1) # Small flat-colour image: fast compression is enough
+    return buf.getvalue()
+
+
+# --- Telegram file_id reuse ---
+
+_file_ids = OrderedDict() # board key -> Telegram file_id, least recently used first
+
+
+def cached_file_id(key: str):
+    """Returns the Telegram file_id of an already uploaded image of this board, if any."""
+    file_id = _file_ids.get(key)
+    if file_id is not None:
+        _file_ids.move_to_end(key)
+    return file_id
+
+
+def remember_file_id(key: str, file_id: str):
+    _file_ids[key] = file_id
+    _file_ids.move_to_end(key)
+    if len(_file_ids) > FILE_ID_CACHE_SIZE:
+        _file_ids.popitem(last=False)
+
+
+def forget_file_id(key: str):
+    """Drops a file_id Telegram no longer accepts."""
+    _file_ids.pop(key, None)
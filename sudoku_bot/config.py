@@ -6,3 +6,8 @@ DB_NAME = "sudoku_scores.db"
 
 # Other game settings
 DEFAULT_DIFFICULTY = "easy"
+
+# Scores / leaderboard settings
+SCORE_BATCH_SIZE = 16          # Flush buffered scores once this many are pending
+SCORE_FLUSH_INTERVAL = 2.0     # ...or once the oldest pending score is this many seconds old
+LEADERBOARD_SIZE = 10          # Number of entries returned by the leaderboard
@@ -1,40 +1,231 @@
-# This file makes the db directory a Python package.
-# Database related functions will be added here later.
-
-# Example:
-# import sqlite3
-# from ..config import DB_NAME
-
-# def get_db_connection():
-#     conn = sqlite3.connect(DB_NAME)
-#     conn.row_factory = sqlite3.Row
-#     return conn
-
-# def init_db():
-#     conn = get_db_connection()
-#     # Create tables if they don't exist
-#     # Example:
-#     # conn.execute('''
-#     # CREATE TABLE IF NOT EXISTS users (
-#     #     id INTEGER PRIMARY KEY,
-#     #     telegram_id INTEGER UNIQUE NOT NULL,
-#     #     first_name TEXT,
-#     #     username TEXT
-#     # )
-#     # ''')
-#     # conn.execute('''
-#     # CREATE TABLE IF NOT EXISTS scores (
-#     #     id INTEGER PRIMARY KEY AUTOINCREMENT,
-#     #     user_id INTEGER NOT NULL,
-#     #     difficulty TEXT NOT NULL,
-#     #     time_taken INTEGER, -- seconds
-#     #     solved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-#     #     FOREIGN KEY (user_id) REFERENCES users (id)
-#     # )
-#     # ''')
-#     conn.commit()
-#     conn.close()
-
-# if __name__ == '__main__':
-#     init_db() # Initialize DB if this script is run directly
-#     print(f"Database {DB_NAME} initialized or already exists.")
+# Scores and leaderboard storage (SQLite).
+#
+# Both the web app and the Telegram bot record solve times here. Each process keeps
+# a single connection (opened lazily, reopened after a fork so gunicorn workers never
+# share one), runs SQLite in WAL mode so leaderboard reads don't block writers, and
+# buffers new scores so they are inserted in batches with one executemany/commit.
+# Leaderboard reads are served from a small in-memory cache that is dropped whenever
+# this process inserts scores or another process commits to the database.
+import os
+import sqlite3
+import threading
+import time
+import atexit
+
+try:
+    # Imported as `sudoku_bot.db` (web app)
+    from ..config import DB_NAME, SCORE_BATCH_SIZE, SCORE_FLUSH_INTERVAL, LEADERBOARD_SIZE
+except ImportError:
+    # Imported as `db` when the bot is run from inside sudoku_bot/
+    from config import DB_NAME, SCORE_BATCH_SIZE, SCORE_FLUSH_INTERVAL, LEADERBOARD_SIZE
+
+# Keep the database next to the package so the bot and web app share one file,
+# regardless of the directory they were started from.
+DB_PATH = os.environ.get(
+    'SUDOKU_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), DB_NAME)
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    telegram_id INTEGER UNIQUE NOT NULL,
+    first_name TEXT,
+    username TEXT
+);
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,                -- NULL for web players
+    player_name TEXT NOT NULL,
+    source TEXT NOT NULL,           -- 'web' or 'telegram'
+    difficulty TEXT NOT NULL,
+    time_taken INTEGER NOT NULL,    -- seconds
+    solved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    game_id TEXT,                   -- Set by the web app so one game is never recorded twice
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+-- Covering index for the leaderboard query: filter on difficulty, order by time_taken,
+-- and read the remaining columns straight from the index without touching the table.
+CREATE INDEX IF NOT EXISTS idx_scores_difficulty_time
+    ON scores (difficulty, time_taken, player_name, source, solved_at);
+'''
+
+# Run after SCHEMA; they depend on columns that older databases are missing until migrated.
+POST_MIGRATION_SCHEMA = '''
+CREATE UNIQUE INDEX IF NOT EXISTS idx_scores_game_id ON scores (game_id);
+'''
+
+_lock = threading.RLock()
+_conn = None
+_conn_pid = None
+
+_pending_scores = []        # Rows waiting for the next batched insert
+_pending_since = None       # time.monotonic() of the oldest pending row
+_flush_timer = None         # Flushes the pending rows SCORE_FLUSH_INTERVAL after the first one
+
+_leaderboard_cache = {}     # (difficulty, limit) -> list of dicts
+_cache_data_version = None  # PRAGMA data_version the cache was built against
+
+
+def get_db_connection():
+    """Returns this process's shared connection, opening (and initializing) it if needed."""
+    global _conn, _conn_pid
+    with _lock:
+        pid = os.getpid()
+        if _conn is not None and _conn_pid == pid:
+            return _conn
+
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        _migrate(conn)
+        conn.executescript(POST_MIGRATION_SCHEMA)
+        conn.commit()
+
+        _conn = conn
+        _conn_pid = pid
+        return conn
+
+
+def _migrate(conn):
+    """Adds columns introduced after a database was first created."""
+    columns = {row['name'] for row in conn.execute('PRAGMA table_info(scores)')}
+    if 'game_id' not in columns:
+        try:
+            conn.execute('ALTER TABLE scores ADD COLUMN game_id TEXT')
+        except sqlite3.OperationalError as e:
+            if 'duplicate column' not in str(e): # Another process migrated it first
+                raise
+
+
+def init_db():
+    """Creates the tables and indexes if they don't exist yet."""
+    get_db_connection()
+
+
+def close_db():
+    """Flushes pending scores and closes this process's connection."""
+    global _conn, _conn_pid
+    with _lock:
+        if _conn is None or _conn_pid != os.getpid():
+            return
+        flush_scores() # Also cancels the flush timer
+        _conn.close()
+        _conn = None
+        _conn_pid = None
+
+
+def upsert_user(telegram_id, first_name=None, username=None):
+    """Creates or updates a Telegram user and returns its row id."""
+    with _lock:
+        conn = get_db_connection()
+        conn.execute(
+            '''INSERT INTO users (telegram_id, first_name, username) VALUES (?, ?, ?)
+               ON CONFLICT(telegram_id) DO UPDATE SET first_name = excluded.first_name,
+                                                      username = excluded.username''',
+            (telegram_id, first_name, username)
+        )
+        conn.commit()
+        row = conn.execute('SELECT id FROM users WHERE telegram_id = ?', (telegram_id,)).fetchone()
+        return row['id']
+
+
+def record_score(player_name, difficulty, time_taken, source='web', user_id=None, game_id=None):
+    """
+    Queues a solve time for insertion. Scores with a `game_id` that was already recorded
+    are dropped, so a replayed request can't add the same game twice.
+
+    Scores are written in batches: the batch is flushed when it is full, or by a timer at
+    most SCORE_FLUSH_INTERVAL seconds after its first score, so other processes see it soon.
+    """
+    global _pending_since, _flush_timer
+    with _lock:
+        _pending_scores.append((user_id, player_name, source, difficulty, int(time_taken), game_id))
+        if _pending_since is None:
+            _pending_since = time.monotonic()
+            _flush_timer = threading.Timer(SCORE_FLUSH_INTERVAL, flush_scores)
+            _flush_timer.daemon = True # Exit handling is left to atexit/close_db
+            _flush_timer.start()
+
+        if len(_pending_scores) >= SCORE_BATCH_SIZE:
+            flush_scores()
+
+
+def flush_scores():
+    """Inserts all pending scores in one transaction. Returns the number of rows written."""
+    global _pending_scores, _pending_since, _flush_timer
+    with _lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel() # No-op when called from the timer itself
+            _flush_timer = None
+        if not _pending_scores:
+            return 0
+        conn = get_db_connection()
+        rows = _pending_scores
+        _pending_scores = []
+        _pending_since = None
+        with conn: # Commits, or rolls back on error
+            conn.executemany(
+                'INSERT OR IGNORE INTO scores (user_id, player_name, source, difficulty, time_taken, game_id) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+        _leaderboard_cache.clear()
+        return len(rows)
+
+
+def get_leaderboard(difficulty, limit=LEADERBOARD_SIZE):
+    """Returns the `limit` fastest solves for a difficulty as a list of dicts."""
+    global _cache_data_version
+    with _lock:
+        # Make our own buffered scores visible before reading.
+        flush_scores()
+
+        conn = get_db_connection()
+        # data_version changes whenever *another* connection commits, so writes made by
+        # other workers (or the bot) also invalidate our cache.
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version != _cache_data_version:
+            _leaderboard_cache.clear()
+            _cache_data_version = data_version
+
+        key = (difficulty, limit)
+        cached = _leaderboard_cache.get(key)
+        if cached is not None:
+            return cached
+
+        rows = conn.execute(
+            'SELECT player_name, source, time_taken, solved_at FROM scores '
+            'WHERE difficulty = ? ORDER BY time_taken ASC LIMIT ?',
+            (difficulty, limit)
+        ).fetchall()
+        leaderboard = [dict(row) for row in rows]
+        _leaderboard_cache[key] = leaderboard
+        return leaderboard
+
+
+def _reset_after_fork():
+    """The inherited connection, buffers and cache belong to the parent process."""
+    global _lock, _conn, _conn_pid, _pending_scores, _pending_since, _flush_timer, _cache_data_version
+    _lock = threading.RLock()
+    _conn = None
+    _conn_pid = None
+    _pending_scores = []
+    _pending_since = None
+    _flush_timer = None # The parent's timer thread doesn't exist in the child
+    _leaderboard_cache.clear()
+    _cache_data_version = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Don't lose buffered scores when the process exits normally.
+atexit.register(close_db)
+
+
+if __name__ == '__main__':
+    init_db() # Initialize DB if this script is run directly
+    print(f"Database {DB_PATH} initialized or already exists.")
@@ -0,0 +1,178 @@
+import base64
+import sys
+from array import array
+
+from .sudoku import SIDE
+
+# Take a full-board snapshot every this many moves, so rebuilding the current board
+# only has to replay the few moves made since the last snapshot.
+SNAPSHOT_INTERVAL = 16
+
+# How many moves can be undone. Older moves are folded into the base board (in chunks of
+# SNAPSHOT_INTERVAL), so the log, and its serialized size in the session, stays bounded.
+MAX_UNDO = 96
+
+
+def pack_board(board: list[list[int]]) -> str:
+    """Packs a board into an 81-character string of digits ('0' for empty cells)."""
+    return ''.join(str(num) for row in board for num in row)
+
+
+def unpack_board(packed: str) -> list[list[int]]:
+    """Inverse of pack_board."""
+    return [[int(ch) for ch in packed[r * SIDE:(r + 1) * SIDE]] for r in range(SIDE)]
+
+
+def pack_move(row: int, col: int, num: int, prev: int) -> int:
+    """Packs one move into 16 bits: 4 bits each for row, col, new value and previous value."""
+    return (row << 12) | (col << 8) | (num << 4) | prev
+
+
+def unpack_move(move: int) -> tuple[int, int, int, int]:
+    """Inverse of pack_move. Returns (row, col, num, prev)."""
+    return (move >> 12) & 0xF, (move >> 8) & 0xF, (move >> 4) & 0xF, move & 0xF
+
+
+class GameLog:
+    """
+    A game stored as a base board plus an append-only log of moves.
+
+    Each move records the cell, the new value and the value it replaced, so undo/redo
+    only move a cursor through the log. The current board is rebuilt lazily from the
+    nearest snapshot plus the moves after it, and kept cached while the game is played.
+    The base board starts as the puzzle; moves beyond the undo limit are folded into it.
+    """
+
+    def __init__(self, puzzle, moves=None, cursor=None, snapshots=None, base=None):
+        self.puzzle = puzzle if isinstance(puzzle, str) else pack_board(puzzle) # Givens, never changes
+        self.base = base if base is not None else self.puzzle # Board before the first logged move
+        self.moves = moves if moves is not None else array('H')
+        self.cursor = len(self.moves) if cursor is None else cursor # Moves [0, cursor) are applied
+        self.snapshots = snapshots if snapshots is not None else {} # move index -> packed board
+        self._board = None # Cached board at self._board_at
+        self._board_at = 0
+
+    # --- Board state ---
+
+    def board(self) -> list[list[int]]:
+        """Returns the current board (a fresh copy the caller may modify)."""
+        return [row[:] for row in self._current()]
+
+    def cell(self, row: int, col: int) -> int:
+        return self._current()[row][col]
+
+    def is_given(self, row: int, col: int) -> bool:
+        """True if the cell is one of the puzzle's pre-filled numbers."""
+        return self.puzzle[row * SIDE + col] != '0'
+
+    def _current(self):
+        if self._board is None or self._board_at != self.cursor:
+            self._board = self.board_at(self.cursor)
+            self._board_at = self.cursor
+        return self._board
+
+    def board_at(self, index: int) -> list[list[int]]:
+        """Rebuilds the board as it was after the first `index` moves."""
+        start = self._latest_snapshot(index)
+        board = unpack_board(self.snapshots[start] if start else self.base)
+        for move in self.moves[start:index]:
+            row, col, num, _prev = unpack_move(move)
+            board[row][col] = num
+        return board
+
+    def _latest_snapshot(self, index: int) -> int:
+        """Index of the newest snapshot at or before `index` (0 means the base board)."""
+        return max((i for i in self.snapshots if i <= index), default=0)
+
+    def replay(self):
+        """Yields (row, col, num, prev) for every applied move still in the log, oldest first."""
+        for move in self.moves[:self.cursor]:
+            yield unpack_move(move)
+
+    # --- Moves ---
+
+    def fill(self, row: int, col: int, num: int) -> int:
+        """Sets a cell and appends the move to the log. Returns the previous value."""
+        board = self._current()
+        prev = board[row][col]
+        if self.cursor < len(self.moves):
+            # A new move after undo discards the redo tail
+            del self.moves[self.cursor:]
+            for i in [i for i in self.snapshots if i > self.cursor]:
+                del self.snapshots[i]
+
+        self.moves.append(pack_move(row, col, num, prev))
+        board[row][col] = num
+        self.cursor += 1
+        self._board_at = self.cursor
+        if self.cursor % SNAPSHOT_INTERVAL == 0:
+            self.snapshots[self.cursor] = pack_board(board)
+        if len(self.moves) >= MAX_UNDO + SNAPSHOT_INTERVAL:
+            self._compact(SNAPSHOT_INTERVAL)
+        return prev
+
+    def _compact(self, count: int):
+        """Folds the oldest `count` (applied) moves into the base board; they can no longer be undone."""
+        self.base = pack_board(self.board_at(count))
+        del self.moves[:count]
+        self.cursor -= count
+        self._board_at = self.cursor # The cached board itself is unchanged
+        # count is a multiple of SNAPSHOT_INTERVAL, so the remaining snapshots stay aligned
+        self.snapshots = {i - count: packed for i, packed in self.snapshots.items() if i > count}
+
+    def can_undo(self) -> bool:
+        return self.cursor > 0
+
+    def can_redo(self) -> bool:
+        return self.cursor < len(self.moves)
+
+    def undo(self):
+        """Reverts the last applied move. Returns (row, col, value) of the changed cell, or None."""
+        if not self.can_undo():
+            return None
+        board = self._current()
+        self.cursor -= 1
+        row, col, _num, prev = unpack_move(self.moves[self.cursor])
+        board[row][col] = prev
+        self._board_at = self.cursor
+        return row, col, prev
+
+    def redo(self):
+        """Re-applies the next undone move. Returns (row, col, value) of the changed cell, or None."""
+        if not self.can_redo():
+            return None
+        board = self._current()
+        row, col, num, _prev = unpack_move(self.moves[self.cursor])
+        board[row][col] = num
+        self.cursor += 1
+        self._board_at = self.cursor
+        return row, col, num
+
+    # --- Serialization (e.g. for the Flask session) ---
+
+    def to_dict(self) -> dict:
+        """
+        Serializes the log to JSON-friendly types.
+        Only the latest snapshot at or before the cursor is kept, which is all that is needed
+        to rebuild the current board; older states are replayed from the puzzle on demand.
+        """
+        moves = array('H', self.moves)
+        if sys.byteorder == 'big':
+            moves.byteswap() # Always store little-endian
+        latest = self._latest_snapshot(self.cursor)
+        return {
+            'puzzle': self.puzzle,
+            'base': self.base,
+            'moves': base64.b64encode(moves.tobytes()).decode('ascii'),
+            'cursor': self.cursor,
+            'snapshots': [[latest, self.snapshots[latest]]] if latest else [],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GameLog':
+        moves = array('H')
+        moves.frombytes(base64.b64decode(data['moves']))
+        if sys.byteorder == 'big':
+            moves.byteswap()
+        snapshots = {int(i): packed for i, packed in data.get('snapshots', [])}
+        return cls(data['puzzle'], moves, data['cursor'], snapshots, data.get('base'))
@@ -0,0 +1,111 @@
+"""
+A pool of ready-made puzzles, loaded from a snapshot file at startup.
+
+Generating a puzzle (especially a "hard" one) can take a long time, so instead of generating
+on every new game we keep pre-generated puzzles in memory and hand out a random one with its
+digits relabelled (1-9 mapped through a random permutation). Relabelling keeps the puzzle and
+its solution valid and makes every served puzzle look different, even when several processes
+(e.g. forked gunicorn workers) share the same snapshot.
+
+Generated puzzles don't always have a unique solution; the generator only guarantees that
+solve_sudoku reaches the stored one. Relabelling changes the solver's search order, so each
+relabelled puzzle is checked against the solver again before it is served.
+
+Build or extend the snapshot with:
+    python -m sudoku_bot.game_logic.puzzle_pool --size 50 --difficulties easy medium
+"""
+import argparse
+import json
+import os
+import random
+
+from .sudoku import generate_puzzle, solve_sudoku, SIDE
+from .move_log import pack_board, unpack_board
+
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+RELABEL_ATTEMPTS = 5 # Relabellings tried before serving the puzzle with its original digits
+
+SNAPSHOT_PATH = os.environ.get(
+    'PUZZLE_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'puzzle_snapshot.json')
+)
+
+
+def relabel(puzzle: list[list[int]], solution: list[list[int]]):
+    """Applies one random digit permutation to both boards. Returns new (puzzle, solution)."""
+    mapping = [0] + random.sample(range(1, SIDE + 1), SIDE) # 0 (empty) stays 0
+    return ([[mapping[n] for n in row] for row in puzzle],
+            [[mapping[n] for n in row] for row in solution])
+
+
+def solver_reaches(puzzle: list[list[int]], solution: list[list[int]]) -> bool:
+    """True if solve_sudoku (also used by the solve routes) turns the puzzle into this solution."""
+    grid = [row[:] for row in puzzle]
+    return solve_sudoku(grid) and grid == solution
+
+
+class PuzzlePool:
+    def __init__(self):
+        self.puzzles = {difficulty: [] for difficulty in DIFFICULTIES} # difficulty -> [(packed puzzle, packed solution)]
+
+    def add(self, difficulty: str, puzzle: list[list[int]], solution: list[list[int]]):
+        self.puzzles.setdefault(difficulty, []).append((pack_board(puzzle), pack_board(solution)))
+
+    def sizes(self) -> dict:
+        return {difficulty: len(entries) for difficulty, entries in self.puzzles.items()}
+
+    def take(self, difficulty: str):
+        """Returns (puzzle, solution) for a new game, generating one only if the pool is empty."""
+        entries = self.puzzles.get(difficulty)
+        if not entries:
+            return generate_puzzle(difficulty)
+        packed_puzzle, packed_solution = random.choice(entries)
+        puzzle, solution = unpack_board(packed_puzzle), unpack_board(packed_solution)
+        for _ in range(RELABEL_ATTEMPTS):
+            relabelled = relabel(puzzle, solution)
+            if solver_reaches(*relabelled):
+                return relabelled
+        return puzzle, solution # As generated, which the generator checked against the solver
+
+    def fill(self, difficulty: str, size: int):
+        """Generates puzzles until the pool holds at least `size` for this difficulty."""
+        while len(self.puzzles.setdefault(difficulty, [])) < size:
+            self.add(difficulty, *generate_puzzle(difficulty))
+
+    def load(self, path: str = SNAPSHOT_PATH) -> bool:
+        """Loads puzzles from a snapshot file. Returns False if there is no snapshot."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        for difficulty, entries in data.items():
+            self.puzzles.setdefault(difficulty, []).extend(tuple(entry) for entry in entries)
+        return True
+
+    def save(self, path: str = SNAPSHOT_PATH):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({difficulty: [list(entry) for entry in entries]
+                       for difficulty, entries in self.puzzles.items()}, f)
+        os.replace(tmp_path, path) # Never leave a half-written snapshot behind
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or extend the puzzle snapshot loaded at startup.")
+    parser.add_argument('--size', type=int, default=50, help="Puzzles to keep per difficulty.")
+    parser.add_argument('--difficulties', nargs='+', default=DIFFICULTIES, choices=DIFFICULTIES)
+    parser.add_argument('--path', default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    pool = PuzzlePool()
+    pool.load(args.path)
+    for difficulty in args.difficulties:
+        print(f"Generating '{difficulty}' puzzles ({len(pool.puzzles.get(difficulty, []))}/{args.size} already in snapshot)...")
+        # Save after every puzzle so slow difficulties can be built up over several runs
+        while len(pool.puzzles.setdefault(difficulty, [])) < args.size:
+            pool.fill(difficulty, len(pool.puzzles[difficulty]) + 1)
+            pool.save(args.path)
+    pool.save(args.path)
+    print(f"Snapshot {args.path}: {pool.sizes()}")
@@ -1,7 +1,5 @@
 import random
 
-import numpy as np
-
 # Base pattern for Sudoku generation
 BASE = 3
 SIDE = BASE * BASE
@@ -185,6 +183,32 @@ def solve_sudoku(grid: list[list[int]]) -> bool:
             grid[row][col] = 0  # Backtrack
     return False
 
+def solve_sudoku_steps(grid: list[list[int]]):
+    """
+    Solves a Sudoku puzzle like solve_sudoku (same search order, so the same solution),
+    but as a generator that yields every step as (action, row, col, num):
+      'deduce' - the cell had only one possible number,
+      'place'  - a number was tried in a cell with several candidates,
+      'remove' - backtracking cleared the cell again (num is 0).
+    Modifies the grid in place. The generator's return value is True if a solution is found.
+    Steps are produced only as they are consumed, so a caller can stop a long solve at any time.
+    """
+    find = find_empty(grid)
+    if not find:
+        return True  # Puzzle is solved
+    row, col = find
+
+    candidates = [num for num in range(1, 10) if is_valid_move(grid, row, col, num)]
+    action = 'deduce' if len(candidates) == 1 else 'place'
+    for num in candidates:
+        grid[row][col] = num
+        yield action, row, col, num
+        if (yield from solve_sudoku_steps(grid)):
+            return True
+        grid[row][col] = 0  # Backtrack
+        yield 'remove', row, col, 0
+    return False
+
 def find_empty(grid: list[list[int]]):
     """Finds an empty cell (represented by 0) in the grid."""
     for i in range(SIDE):
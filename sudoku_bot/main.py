@@ -1,10 +1,19 @@
 import logging
+import time
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.constants import ParseMode
+from telegram.error import BadRequest
 
 from config import BOT_TOKEN, DEFAULT_DIFFICULTY
 from game_logic.sudoku import generate_puzzle, check_win, print_board_to_console, SIDE
+from game_logic.move_log import GameLog
+from db import init_db, record_score, upsert_user, get_leaderboard
+
+try:
+    import board_image
+except ImportError: # Pillow not installed: fall back to the HTML board
+    board_image = None
 
 # Enable logging
 logging.basicConfig(
@@ -17,8 +26,9 @@ logger = logging.getLogger(__name__)
 # We will store:
 # context.user_data['puzzle'] -> the initial puzzle board (immutable for the current game)
 # context.user_data['solution'] -> the solution to the current puzzle (immutable)
-# context.user_data['current_board'] -> the board as the user fills it (mutable)
+# context.user_data['game'] -> GameLog: the move log the current board is rebuilt from (supports undo/redo)
 # context.user_data['game_active'] -> boolean, True if a game is in progress
+# context.user_data['started_at'] -> time.time() when the game started, used for the solve time
 
 # --- Helper function to display board ---
 def format_board_html(board: list[list[int]], original_puzzle: list[list[int]] = None) -> str:
@@ -56,17 +66,38 @@ def format_board_html(board: list[list[int]], original_puzzle: list[list[int]] =
     s += "</pre>"
     return s
 
+async def send_board_image(update: Update, board: list[list[int]], puzzle: list[list[int]], caption: str = None):
+    """Sends the board as a PNG, reusing Telegram's file_id when this exact state was sent before."""
+    key = board_image.board_key(board, puzzle)
+
+    file_id = board_image.cached_file_id(key)
+    if file_id is not None:
+        try:
+            await update.message.reply_photo(file_id, caption=caption)
+            return
+        except BadRequest:
+            board_image.forget_file_id(key) # Telegram no longer knows this file; upload it again
+
+    message = await update.message.reply_photo(board_image.render_png(key), caption=caption)
+    board_image.remember_file_id(key, message.photo[-1].file_id)
+
 async def display_current_board(update: Update, context: ContextTypes.DEFAULT_TYPE, message_text: str = None):
     """Helper function to display the current board to the user."""
     if not context.user_data.get('game_active', False):
         await update.message.reply_text("هنوز بازی‌ای شروع نشده! با /new_game یک بازی جدید شروع کن.")
         return
 
-    board_str = format_board_html(context.user_data['current_board'], context.user_data['puzzle'])
+    board = context.user_data['game'].board()
+    puzzle = context.user_data['puzzle']
 
     # TODO: Add inline keyboard for numbers 1-9 and a "Clear" button for input
     # For now, just display the board
 
+    if board_image is not None:
+        await send_board_image(update, board, puzzle, message_text)
+        return
+
+    board_str = format_board_html(board, puzzle)
     full_message = ""
     if message_text:
         full_message += message_text + "\n\n"
@@ -114,9 +145,10 @@ async def new_game(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
         context.user_data['puzzle'] = puzzle
         context.user_data['solution'] = solution
-        context.user_data['current_board'] = [row[:] for row in puzzle] # Make a mutable copy for the user to play
+        context.user_data['game'] = GameLog(puzzle) # The user's moves are appended to this log
         context.user_data['game_active'] = True
         context.user_data['difficulty'] = difficulty
+        context.user_data['started_at'] = time.time()
 
         logger.info(f"Game generated for user {update.effective_user.id}. Puzzle displayed below (debug).")
         # print_board_to_console(puzzle) # Debugging
@@ -140,6 +172,100 @@ async def board_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     await display_current_board(update, context, "جدول فعلی شما:")
 
 
+async def fill_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Places a number on the board: /fill <row> <col> <num>."""
+    if not context.user_data.get('game_active', False):
+        await update.message.reply_text("هنوز بازی‌ای شروع نشده! با /new_game یک بازی جدید شروع کن.")
+        return
+
+    try:
+        row, col, num = (int(arg) for arg in context.args)
+    except (TypeError, ValueError):
+        await update.message.reply_text("فرمت دستور: /fill <ردیف> <ستون> <عدد> (مثلا: /fill 1 1 5)")
+        return
+
+    if not (1 <= row <= SIDE and 1 <= col <= SIDE and 0 <= num <= SIDE):
+        await update.message.reply_text("ردیف و ستون باید بین 1 تا 9 و عدد بین 0 تا 9 باشد.")
+        return
+
+    row, col = row - 1, col - 1
+    game = context.user_data['game']
+    if game.is_given(row, col):
+        await update.message.reply_text("این خانه جزو اعداد اولیه پازل است و قابل تغییر نیست.")
+        return
+
+    if game.cell(row, col) != num:
+        game.fill(row, col, num)
+    await display_current_board(update, context)
+
+
+async def undo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Reverts the last move."""
+    if not context.user_data.get('game_active', False):
+        await update.message.reply_text("هنوز بازی‌ای شروع نشده! با /new_game یک بازی جدید شروع کن.")
+        return
+    if context.user_data['game'].undo() is None:
+        await update.message.reply_text("حرکتی برای بازگردانی وجود ندارد.")
+        return
+    await display_current_board(update, context, "حرکت قبلی بازگردانده شد.")
+
+
+async def redo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Re-applies the last undone move."""
+    if not context.user_data.get('game_active', False):
+        await update.message.reply_text("هنوز بازی‌ای شروع نشده! با /new_game یک بازی جدید شروع کن.")
+        return
+    if context.user_data['game'].redo() is None:
+        await update.message.reply_text("حرکتی برای انجام دوباره وجود ندارد.")
+        return
+    await display_current_board(update, context, "حرکت دوباره انجام شد.")
+
+
+async def check_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Checks the board and records the solve time on a win."""
+    if not context.user_data.get('game_active', False):
+        await update.message.reply_text("هنوز بازی‌ای شروع نشده! با /new_game یک بازی جدید شروع کن.")
+        return
+
+    if not check_win(context.user_data['game'].board(), context.user_data['solution']):
+        await update.message.reply_text("جدول هنوز کامل نشده یا دارای خطا است.")
+        return
+
+    time_taken = int(time.time() - context.user_data.get('started_at', time.time()))
+    user = update.effective_user
+    try:
+        user_id = upsert_user(user.id, user.first_name, user.username)
+        record_score(user.first_name or user.username or str(user.id), context.user_data['difficulty'],
+                     time_taken, source='telegram', user_id=user_id)
+    except Exception as e:
+        logger.error(f"Error recording score for user {user.id}: {e}", exc_info=True)
+
+    context.user_data['game_active'] = False
+    minutes, seconds = divmod(time_taken, 60)
+    await update.message.reply_text(
+        f"تبریک! شما سودوکو را در {minutes:02d}:{seconds:02d} حل کردید! 🎉\n"
+        "برای دیدن جدول امتیازات: /leaderboard"
+    )
+
+
+async def leaderboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Shows the fastest solves for a difficulty."""
+    difficulty = context.user_data.get('difficulty', DEFAULT_DIFFICULTY)
+    if context.args and context.args[0].lower() in ["easy", "medium", "hard"]:
+        difficulty = context.args[0].lower()
+
+    leaderboard = get_leaderboard(difficulty)
+    if not leaderboard:
+        await update.message.reply_text(f"هنوز امتیازی برای سطح '{difficulty}' ثبت نشده!")
+        return
+
+    lines = [f"🏆 جدول امتیازات ({difficulty}):"]
+    for rank, entry in enumerate(leaderboard, start=1):
+        minutes, seconds = divmod(entry['time_taken'], 60)
+        lines.append(f"{rank}. {entry['player_name']} - {minutes:02d}:{seconds:02d}")
+    await update.message.reply_text("\n".join(lines))
+
+
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Displays info on how to use the bot."""
     help_text = (
@@ -154,7 +280,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "  مثال: `/fill 1 1 5` (عدد 5 در ردیف اول، ستون اول)\n"
         "  مثال پاک کردن: `/fill 1 1 0`\n"
         "/board - نمایش جدول فعلی بازی.\n"
+        "/undo و /redo - بازگردانی یا انجام دوباره آخرین حرکت.\n"
         "/check - بررسی اینکه آیا جدول فعلی به درستی حل شده است.\n"
+        "/leaderboard [difficulty] - نمایش سریع‌ترین حل‌ها.\n"
         "/hint - (هنوز پیاده‌سازی نشده) دریافت راهنمایی.\n"
         "/solve - (هنوز پیاده‌سازی نشده) نمایش راه‌حل کامل بازی (بازی فعلی تمام می‌شود).\n"
         "/help - نمایش این پیام راهنما."
@@ -166,6 +294,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
 def main() -> None:
     """Start the bot."""
+    init_db()
     application = Application.builder().token(BOT_TOKEN).build()
 
     # Command handlers
@@ -173,8 +302,11 @@ def main() -> None:
     application.add_handler(CommandHandler("new_game", new_game))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("board", board_command))
-    # application.add_handler(CommandHandler("fill", fill_command)) # To be added next
-    # application.add_handler(CommandHandler("check", check_command)) # To be added next
+    application.add_handler(CommandHandler("fill", fill_command))
+    application.add_handler(CommandHandler("check", check_command))
+    application.add_handler(CommandHandler("undo", undo_command))
+    application.add_handler(CommandHandler("redo", redo_command))
+    application.add_handler(CommandHandler("leaderboard", leaderboard_command))
 
 
     # Run the bot until the user presses Ctrl-C
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import db
+
+
+class ScoresTests(unittest.TestCase):
+    def setUp(self):
+        db.close_db()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'scores.db')
+        patcher = mock.patch.object(db, 'DB_PATH', self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        db.init_db()
+
+    def tearDown(self):
+        db.close_db()
+        self.tmpdir.cleanup()
+
+    def count_rows(self):
+        """Counts scores through a separate connection, as another process would see them."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_scores_are_written_in_batches(self):
+        for i in range(db.SCORE_BATCH_SIZE - 1):
+            db.record_score(f'p{i}', 'easy', 100 + i)
+        self.assertEqual(self.count_rows(), 0)
+        db.record_score('last', 'easy', 50)
+        self.assertEqual(self.count_rows(), db.SCORE_BATCH_SIZE)
+
+    def test_leaderboard_flushes_pending_scores(self):
+        db.record_score('alice', 'easy', 42)
+        self.assertEqual(self.count_rows(), 0)
+        self.assertEqual([row['player_name'] for row in db.get_leaderboard('easy')], ['alice'])
+        self.assertEqual(self.count_rows(), 1)
+
+    def test_timer_flushes_a_partial_batch(self):
+        with mock.patch.object(db, 'SCORE_FLUSH_INTERVAL', 0.05):
+            db.record_score('alice', 'easy', 42)
+        deadline = time.monotonic() + 5
+        while self.count_rows() == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.count_rows(), 1)
+
+    def test_close_flushes_pending_scores(self):
+        db.record_score('alice', 'easy', 42)
+        db.close_db()
+        self.assertEqual(self.count_rows(), 1)
+
+    def test_leaderboard_order_limit_and_difficulty(self):
+        for name, time_taken in [('c', 300), ('a', 100), ('d', 400), ('b', 200)]:
+            db.record_score(name, 'medium', time_taken)
+        db.record_score('other', 'easy', 1)
+
+        leaderboard = db.get_leaderboard('medium', limit=3)
+        self.assertEqual([row['player_name'] for row in leaderboard], ['a', 'b', 'c'])
+        self.assertEqual([row['time_taken'] for row in leaderboard], [100, 200, 300])
+        self.assertEqual(len(db.get_leaderboard('medium')), 4)
+        self.assertEqual(db.get_leaderboard('hard'), [])
+
+    def test_telegram_scores_keep_user_and_source(self):
+        user_id = db.upsert_user(1234, 'Ali', 'ali')
+        self.assertEqual(db.upsert_user(1234, 'Ali R', 'ali'), user_id)
+        db.record_score('Ali R', 'easy', 60, source='telegram', user_id=user_id)
+        self.assertEqual(db.get_leaderboard('easy')[0]['source'], 'telegram')
+
+    def test_cache_is_invalidated_by_local_writes(self):
+        db.record_score('slow', 'easy', 500)
+        self.assertEqual(len(db.get_leaderboard('easy')), 1)
+        db.record_score('fast', 'easy', 5)
+        self.assertEqual([row['player_name'] for row in db.get_leaderboard('easy')], ['fast', 'slow'])
+
+    def test_cache_is_invalidated_by_other_connections(self):
+        db.record_score('slow', 'easy', 500)
+        first = db.get_leaderboard('easy')
+        self.assertIs(db.get_leaderboard('easy'), first) # Served from the cache
+
+        # Another worker (or the bot) commits through its own connection
+        other = sqlite3.connect(self.db_path)
+        with other:
+            other.execute(
+                "INSERT INTO scores (player_name, source, difficulty, time_taken) VALUES ('fast', 'web', 'easy', 5)"
+            )
+        other.close()
+
+        self.assertEqual([row['player_name'] for row in db.get_leaderboard('easy')], ['fast', 'slow'])
+
+
+if __name__ == '__main__':
+    unittest.main()
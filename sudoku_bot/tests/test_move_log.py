@@ -0,0 +1,161 @@
+import random
+import unittest
+
+from game_logic.sudoku import generate_full_board, remove_numbers, SIDE
+from game_logic.move_log import (
+    GameLog, MAX_UNDO, SNAPSHOT_INTERVAL, pack_board, unpack_board, pack_move, unpack_move
+)
+
+
+def make_puzzle():
+    return remove_numbers(generate_full_board(), "easy")
+
+
+class ReferenceGame:
+    """Plain list-of-boards history that GameLog must behave like (up to its undo limit)."""
+
+    def __init__(self, puzzle):
+        self.history = [[row[:] for row in puzzle]]
+        self.position = 0
+
+    def board(self):
+        return self.history[self.position]
+
+    def fill(self, row, col, num):
+        board = [r[:] for r in self.board()]
+        board[row][col] = num
+        del self.history[self.position + 1:]
+        self.history.append(board)
+        self.position += 1
+
+    def undo(self):
+        self.position -= 1
+
+    def redo(self):
+        self.position += 1
+
+
+class PackingTests(unittest.TestCase):
+    def test_board_round_trip(self):
+        puzzle = make_puzzle()
+        packed = pack_board(puzzle)
+        self.assertEqual(len(packed), SIDE * SIDE)
+        self.assertEqual(unpack_board(packed), puzzle)
+
+    def test_move_round_trip(self):
+        for row, col, num, prev in [(0, 0, 0, 0), (8, 8, 9, 9), (3, 7, 5, 0), (4, 2, 0, 6)]:
+            self.assertEqual(unpack_move(pack_move(row, col, num, prev)), (row, col, num, prev))
+
+
+class GameLogTests(unittest.TestCase):
+    def setUp(self):
+        self.puzzle = make_puzzle()
+        self.empties = [(r, c) for r in range(SIDE) for c in range(SIDE) if self.puzzle[r][c] == 0]
+        self.game = GameLog(self.puzzle)
+
+    def test_new_game_is_the_puzzle(self):
+        self.assertEqual(self.game.board(), self.puzzle)
+        self.assertFalse(self.game.can_undo())
+        self.assertFalse(self.game.can_redo())
+        self.assertIsNone(self.game.undo())
+        self.assertIsNone(self.game.redo())
+
+    def test_fill_undo_redo(self):
+        row, col = self.empties[0]
+        self.assertEqual(self.game.fill(row, col, 5), 0)
+        self.assertEqual(self.game.fill(row, col, 7), 5)
+        self.assertEqual(self.game.cell(row, col), 7)
+
+        self.assertEqual(self.game.undo(), (row, col, 5))
+        self.assertEqual(self.game.undo(), (row, col, 0))
+        self.assertEqual(self.game.board(), self.puzzle)
+        self.assertEqual(self.game.redo(), (row, col, 5))
+        self.assertEqual(self.game.cell(row, col), 5)
+        self.assertTrue(self.game.can_redo())
+
+    def test_new_move_drops_redo_tail(self):
+        (r1, c1), (r2, c2) = self.empties[:2]
+        self.game.fill(r1, c1, 1)
+        self.game.fill(r1, c1, 2)
+        self.game.undo()
+        self.game.fill(r2, c2, 3)
+        self.assertFalse(self.game.can_redo())
+        self.assertEqual(len(self.game.moves), 2)
+        self.assertEqual(self.game.cell(r1, c1), 1)
+        self.assertEqual(self.game.cell(r2, c2), 3)
+
+    def test_snapshots_match_replay(self):
+        for i in range(3 * SNAPSHOT_INTERVAL + 5):
+            row, col = self.empties[i % len(self.empties)]
+            self.game.fill(row, col, i % SIDE + 1)
+        self.assertEqual(sorted(self.game.snapshots), [SNAPSHOT_INTERVAL * k for k in (1, 2, 3)])
+        for index, packed in self.game.snapshots.items():
+            self.assertEqual(unpack_board(packed), self.game.board_at(index))
+        # Undoing behind a snapshot and making a new move drops the stale snapshots
+        for _ in range(SNAPSHOT_INTERVAL + 10):
+            self.game.undo()
+        self.game.fill(*self.empties[0], 9)
+        self.assertTrue(all(i <= self.game.cursor for i in self.game.snapshots))
+
+    def test_givens_stay_givens(self):
+        for _ in range(MAX_UNDO * 3):
+            self.game.fill(*random.choice(self.empties), random.randint(1, SIDE))
+        for r in range(SIDE):
+            for c in range(SIDE):
+                self.assertEqual(self.game.is_given(r, c), self.puzzle[r][c] != 0)
+
+    def test_undo_depth_and_serialized_size_are_bounded(self):
+        sizes = []
+        for i in range(1000):
+            self.game.fill(*random.choice(self.empties), random.randint(0, SIDE))
+            sizes.append(len(str(self.game.to_dict())))
+        self.assertLess(len(self.game.moves), MAX_UNDO + SNAPSHOT_INTERVAL)
+        self.assertLessEqual(max(sizes[200:]), max(sizes[:200]))
+
+        undone = 0
+        while self.game.undo():
+            undone += 1
+        self.assertGreaterEqual(undone, MAX_UNDO)
+
+    def test_round_trip(self):
+        for i in range(40):
+            self.game.fill(*random.choice(self.empties), random.randint(0, SIDE))
+        for _ in range(5):
+            self.game.undo()
+        restored = GameLog.from_dict(self.game.to_dict())
+        self.assertEqual(restored.board(), self.game.board())
+        self.assertEqual(restored.cursor, self.game.cursor)
+        self.assertEqual(list(restored.moves), list(self.game.moves))
+        self.assertEqual(restored.redo(), self.game.redo())
+        self.assertEqual(restored.board(), self.game.board())
+
+    def test_old_session_without_base(self):
+        self.game.fill(*self.empties[0], 4)
+        data = self.game.to_dict()
+        del data['base']
+        self.assertEqual(GameLog.from_dict(data).board(), self.game.board())
+
+    def test_matches_reference_model(self):
+        rng = random.Random(2024)
+        reference = ReferenceGame(self.puzzle)
+        game = self.game
+        for step in range(3000):
+            action = rng.random()
+            if action < 0.6:
+                row, col = rng.choice(self.empties)
+                num = rng.randint(0, SIDE)
+                game.fill(row, col, num)
+                reference.fill(row, col, num)
+            elif action < 0.8:
+                if game.undo() is not None:
+                    reference.undo()
+            elif game.redo() is not None:
+                reference.redo()
+            if step % 10 == 0:
+                game = GameLog.from_dict(game.to_dict()) # As if the game went through the session
+            self.assertEqual(game.board(), reference.board(), f"step {step}")
+            self.assertEqual(game.can_redo(), reference.position < len(reference.history) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from game_logic.sudoku import generate_full_board, solve_sudoku, BASE, SIDE
+from game_logic.puzzle_pool import PuzzlePool, relabel, solver_reaches
+
+
+def two_solution_puzzle():
+    """
+    A full board with an a/b rectangle removed: two rows of one band, two columns in different
+    stacks, holding a b / b a. Both ways of filling it back in are valid, so the puzzle has
+    two solutions and the solver's choice depends on how the digits are labelled.
+    """
+    while True:
+        board = generate_full_board()
+        for r1 in range(SIDE):
+            for r2 in range(r1 + 1, (r1 // BASE + 1) * BASE): # Same band
+                for c1 in range(SIDE):
+                    for c2 in range((c1 // BASE + 1) * BASE, SIDE): # Different stacks
+                        if board[r1][c1] == board[r2][c2] and board[r1][c2] == board[r2][c1]:
+                            puzzle = [row[:] for row in board]
+                            for r, c in [(r1, c1), (r1, c2), (r2, c1), (r2, c2)]:
+                                puzzle[r][c] = 0
+                            solution = [row[:] for row in puzzle]
+                            solve_sudoku(solution) # What the generator would have stored
+                            return puzzle, solution
+
+
+class PuzzlePoolTests(unittest.TestCase):
+    def test_relabel_keeps_empty_cells_and_validity(self):
+        puzzle, solution = two_solution_puzzle()
+        new_puzzle, new_solution = relabel(puzzle, solution)
+        for r in range(SIDE):
+            self.assertEqual(sorted(new_solution[r]), list(range(1, SIDE + 1)))
+            for c in range(SIDE):
+                self.assertEqual(new_puzzle[r][c] == 0, puzzle[r][c] == 0)
+                if puzzle[r][c]:
+                    self.assertEqual(new_puzzle[r][c], new_solution[r][c])
+
+    def test_taken_puzzles_solve_to_their_solution(self):
+        puzzle, solution = two_solution_puzzle()
+        # Plain relabelling does send the solver to the other solution some of the time
+        self.assertFalse(all(solver_reaches(*relabel(puzzle, solution)) for _ in range(200)))
+
+        pool = PuzzlePool()
+        pool.add('medium', puzzle, solution)
+        for _ in range(200):
+            taken_puzzle, taken_solution = pool.take('medium')
+            self.assertTrue(solver_reaches(taken_puzzle, taken_solution))
+
+    def test_load_and_save_round_trip(self):
+        pool = PuzzlePool()
+        pool.add('easy', *two_solution_puzzle())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'snapshot.json')
+            pool.save(path)
+            loaded = PuzzlePool()
+            self.assertTrue(loaded.load(path))
+            self.assertFalse(PuzzlePool().load(os.path.join(tmpdir, 'missing.json')))
+        self.assertEqual(loaded.puzzles['easy'], pool.puzzles['easy'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# The web app imports the bot's modules as the `sudoku_bot` package from the repository root
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import sudoku_bot.db as scores_db
+from sudoku_bot.game_logic.move_log import unpack_board
+from web_app.app import create_app, DEFAULT_PLAYER_NAME
+
+
+class ScoreRecordingTests(unittest.TestCase):
+    def setUp(self):
+        scores_db.close_db()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(scores_db, 'DB_PATH', os.path.join(self.tmpdir.name, 'scores.db'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = create_app().test_client()
+
+    def tearDown(self):
+        scores_db.close_db()
+        self.tmpdir.cleanup()
+
+    def new_game(self, player_name=''):
+        data = self.client.post('/api/new_game', json={'difficulty': 'easy', 'player_name': player_name}).get_json()
+        return data['puzzle_board']
+
+    def solve_by_hand(self, puzzle):
+        with self.client.session_transaction() as session:
+            solution = unpack_board(session['solution_board'])
+        for r in range(9):
+            for c in range(9):
+                if puzzle[r][c] == 0:
+                    self.client.post('/api/fill_cell', json={'row': r, 'col': c, 'num': solution[r][c]})
+
+    def leaderboard(self):
+        return self.client.get('/api/leaderboard?difficulty=easy').get_json()['leaderboard']
+
+    def test_win_is_recorded(self):
+        self.solve_by_hand(self.new_game('Sara'))
+        self.assertTrue(self.client.get('/api/check_game').get_json()['is_solved'])
+        self.assertEqual([row['player_name'] for row in self.leaderboard()], ['Sara'])
+
+    def test_empty_name_plays_as_guest_again(self):
+        self.new_game('Zed')
+        self.solve_by_hand(self.new_game(''))
+        self.client.get('/api/check_game')
+        self.assertEqual([row['player_name'] for row in self.leaderboard()], [DEFAULT_PLAYER_NAME])
+
+    def test_board_finished_with_hints_is_not_recorded(self):
+        self.new_game()
+        while self.client.get('/api/hint').get_json()['hint'] is not None:
+            pass
+        self.assertTrue(self.client.get('/api/check_game').get_json()['is_solved'])
+        self.assertEqual(self.leaderboard(), [])
+
+    def test_replayed_session_is_recorded_once(self):
+        self.solve_by_hand(self.new_game())
+        before_win = self.client.get_cookie('session').value
+        self.client.get('/api/check_game')
+        self.client.set_cookie('session', before_win) # Replay the cookie from before the win
+        self.assertTrue(self.client.get('/api/check_game').get_json()['is_solved'])
+        self.assertEqual(len(self.leaderboard()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,103 +1,172 @@
+import itertools
+import json
+import math
 import os
-from flask import Flask, jsonify, request, session, render_template
 import sys
+import threading
+import time
+import uuid
 
-# Add the parent directory to the Python path to access sudoku_bot
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from sudoku_bot.game_logic.sudoku import generate_puzzle, check_win as check_sudoku_win, solve_sudoku, is_valid_move, SIDE
-
-from whitenoise import WhiteNoise
-
-app = Flask(__name__, template_folder='templates', static_folder='static')
-# It's crucial to set a secret key for session management
-# Read from environment variable for production, with a fallback for local development
-app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev_secret_key_123!@#')
-# IMPORTANT: The fallback key is for local development ONLY.
-# Set FLASK_SECRET_KEY in your production environment (e.g., Hugging Face Space secrets).
-
-# Serve static files efficiently in production using WhiteNoise
-# WhiteNoise will automatically find your static files if static_folder is set correctly
-app.wsgi_app = WhiteNoise(app.wsgi_app, root=os.path.join(os.path.dirname(__file__), 'static'))
-# Add prefix for static files if they are not at root (e.g. /static/css/style.css)
-# app.wsgi_app = WhiteNoise(app.wsgi_app, root=os.path.join(os.path.dirname(__file__), 'static'), prefix='static/')
-# However, Flask's default static_url_path is '/static', so WhiteNoise should work correctly
-# with the default static serving if files are in 'web_app/static' and accessed via url_for.
-# The most robust way for WhiteNoise to pick up Flask's static files is to let it wrap the app
-# and it will use Flask's static_folder and static_url_path.
-# Let's simplify the WhiteNoise setup assuming default Flask static handling.
-# app.wsgi_app = WhiteNoise(app.wsgi_app)
-# WhiteNoise should automatically use app.static_folder.
-# If static_folder is 'static' (relative to app.py location), it's usually fine.
-# The Flask app's static_folder is 'static', relative to the app's root path (where app.py is).
-# So, web_app/static/ should be found by WhiteNoise.
-# The following configuration is standard and should work:
-# It tells WhiteNoise to serve files from the app's static_folder
-# (which is 'static' relative to app.py, so web_app/static/)
-# at the URL specified by app.static_url_path (default is '/static').
-app.wsgi_app = WhiteNoise(app.wsgi_app, root=os.path.join(os.path.dirname(__file__), 'static'))
-# No, this is not quite right. WhiteNoise's `root` is for *all* files if you are not using add_files.
-# The recommended way for Flask is simpler:
-# app.wsgi_app = WhiteNoise(app.wsgi_app)
-# app.wsgi_app.add_files(os.path.join(os.path.dirname(__file__), 'static'), prefix='static/')
-# Flask's default static_url_path is 'static'.
-# `static_folder` is 'static' relative to `app.py`.
-# The most straightforward way:
-app.wsgi_app = WhiteNoise(app.wsgi_app)
-app.wsgi_app.add_files(os.path.join(os.path.dirname(__file__), 'static'), prefix=app.static_url_path)
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, session, render_template
+
+if not __package__:
+    # Run directly (python web_app/app.py): add the parent directory to the Python path to access sudoku_bot.
+    # When imported as web_app.app (gunicorn), the repository root is already on the path.
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sudoku_bot.game_logic.sudoku import check_win as check_sudoku_win, solve_sudoku, solve_sudoku_steps, is_valid_move, SIDE
+from sudoku_bot.game_logic.move_log import GameLog, pack_board, unpack_board
+from sudoku_bot.game_logic.puzzle_pool import PuzzlePool
+from sudoku_bot.db import init_db, close_db, get_db_connection, record_score, get_leaderboard
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+DEFAULT_PLAYER_NAME = 'مهمان'
+
+# "Watch it solve" stream limits: steps are sent at most this fast, and a stream never
+# runs longer than this (the rest of the solve is skipped and the solution sent at once).
+SOLVE_STREAM_MAX_STEPS_PER_SECOND = 50
+SOLVE_STREAM_MAX_SECONDS = 30
+# Each open stream holds a worker thread for up to SOLVE_STREAM_MAX_SECONDS; keep this below
+# gunicorn's --threads so ordinary requests are still served while streams are running.
+SOLVE_STREAM_MAX_CONCURRENT = 2
+
+_solve_stream_slots = threading.BoundedSemaphore(SOLVE_STREAM_MAX_CONCURRENT) # Per process
+
+bp = Blueprint('game', __name__)
+
+
+def create_app():
+    """
+    Builds the Flask app and warms it up.
+
+    Designed for `gunicorn --preload`: everything loaded here (the puzzle snapshot, compiled
+    templates) is built once in the master process and shared copy-on-write by the forked
+    workers. Per-process resources such as the SQLite connection are opened after the fork.
+    """
+    from whitenoise import WhiteNoise # Only needed once the app is actually built
+
+    started = time.perf_counter()
+    app = Flask(__name__, template_folder='templates', static_folder='static')
+    # It's crucial to set a secret key for session management
+    # Read from environment variable for production, with a fallback for local development
+    app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev_secret_key_123!@#')
+    # IMPORTANT: The fallback key is for local development ONLY.
+    # Set FLASK_SECRET_KEY in your production environment (e.g., Hugging Face Space secrets).
+
+    app.register_blueprint(bp)
+
+    # Serve static files efficiently in production using WhiteNoise, from the app's static
+    # folder (web_app/static/) at Flask's static_url_path ('/static').
+    app.wsgi_app = WhiteNoise(app.wsgi_app)
+    app.wsgi_app.add_files(os.path.join(os.path.dirname(__file__), 'static'), prefix=app.static_url_path)
+
+    # Ready-made puzzles, so new games don't have to wait for the generator
+    pool = PuzzlePool()
+    pool.load()
+    app.extensions['puzzle_pool'] = pool
+
+    # Compile the page template now instead of on the first request
+    app.jinja_env.get_template('index.html')
+
+    # Create the scores tables up front so the first win doesn't pay for it. The connection
+    # is closed again so a preloading master doesn't hold one across the fork.
+    init_db()
+    close_db()
+
+    app.config['STARTUP_SECONDS'] = time.perf_counter() - started
+    return app
+
+
+_app = None
+
+def __getattr__(name):
+    # Keeps `web_app.app:app` working while importing this module stays cheap:
+    # the app is only built when something asks for it.
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # --- Helper Functions ---
 def get_user_game():
-    """Retrieves game state from session."""
+    """Retrieves game state from session. The current board is rebuilt from the move log."""
+    game_log = session.get('game_log')
+    solution_board = session.get('solution_board')
     return {
-        'puzzle_board': session.get('puzzle_board'),
-        'solution_board': session.get('solution_board'),
-        'current_board': session.get('current_board'),
+        'game_log': GameLog.from_dict(game_log) if game_log else None,
+        'solution_board': unpack_board(solution_board) if solution_board else None,
         'difficulty': session.get('difficulty')
     }
 
-def set_user_game(puzzle, solution, current, difficulty):
+def save_game_log(game_log):
+    """Saves the (compact) move log back to the session."""
+    session['game_log'] = game_log.to_dict()
+
+def set_user_game(puzzle, solution, difficulty):
     """Saves game state to session."""
-    session['puzzle_board'] = puzzle
-    session['solution_board'] = solution
-    session['current_board'] = current
+    session['game_log'] = GameLog(puzzle).to_dict()
+    session['solution_board'] = pack_board(solution)
     session['difficulty'] = difficulty
     session['game_active'] = True
+    session['started_at'] = time.time()
+    session['score_recorded'] = False
+    session['hints_used'] = 0
+    # The cookie can be replayed, so score_recorded alone can't stop a game being recorded
+    # twice; the scores table keeps game ids unique.
+    session['game_id'] = uuid.uuid4().hex
 
 def clear_user_game():
     """Clears game state from session."""
-    session.pop('puzzle_board', None)
+    session.pop('game_log', None)
     session.pop('solution_board', None)
-    session.pop('current_board', None)
     session.pop('difficulty', None)
     session.pop('game_active', False)
+    session.pop('started_at', None)
+    session.pop('score_recorded', None)
+    session.pop('hints_used', None)
+    session.pop('game_id', None)
+
+def fill_with_solution(game_log, solution_board):
+    """Logs one move per cell that differs from the solution."""
+    current_board = game_log.board()
+    for r_idx in range(SIDE):
+        for c_idx in range(SIDE):
+            if current_board[r_idx][c_idx] != solution_board[r_idx][c_idx]:
+                game_log.fill(r_idx, c_idx, solution_board[r_idx][c_idx])
 
 # --- API Routes ---
 
-@app.route('/api/new_game', methods=['POST'])
+@bp.route('/api/new_game', methods=['POST'])
 def new_game_api():
     data = request.get_json()
     difficulty = data.get('difficulty', 'easy').lower()
-    if difficulty not in ['easy', 'medium', 'hard']:
+    if difficulty not in DIFFICULTIES:
         difficulty = 'easy'
 
+    player_name = str(data.get('player_name') or '').strip()[:32]
+    if player_name:
+        session['player_name'] = player_name
+    else:
+        session.pop('player_name', None) # Play as a guest again
+
     try:
-        puzzle, solution = generate_puzzle(difficulty)
-        current_board_copy = [row[:] for row in puzzle] # User will modify this
-        set_user_game(puzzle, solution, current_board_copy, difficulty)
+        puzzle, solution = current_app.extensions['puzzle_pool'].take(difficulty)
+        set_user_game(puzzle, solution, difficulty)
 
         return jsonify({
             'message': f'New game started with difficulty: {difficulty}',
             'puzzle_board': puzzle,
-            'current_board': current_board_copy, # Send initial state
+            'current_board': puzzle, # Send initial state
             'difficulty': difficulty
         }), 200
     except Exception as e:
         print(f"Error generating puzzle: {e}") # Log error
         return jsonify({'error': 'Could not start new game. ' + str(e)}), 500
 
-@app.route('/api/fill_cell', methods=['POST'])
+@bp.route('/api/fill_cell', methods=['POST'])
 def fill_cell_api():
     if not session.get('game_active'):
         return jsonify({'error': 'No active game. Start a new game first.'}), 400
@@ -107,11 +176,9 @@ def fill_cell_api():
     col = data.get('col')
     num = data.get('num')
 
-    game_state = get_user_game()
-    current_board = game_state.get('current_board')
-    puzzle_board = game_state.get('puzzle_board')
+    game_log = get_user_game().get('game_log')
 
-    if current_board is None or puzzle_board is None:
+    if game_log is None:
          return jsonify({'error': 'Game state not found in session.'}), 500
 
     if not (isinstance(row, int) and isinstance(col, int) and isinstance(num, int) and \
@@ -119,36 +186,79 @@ def fill_cell_api():
         return jsonify({'error': 'Invalid input. Row/col must be 0-8, num must be 0-9 (0 to clear).'}), 400
 
     # Check if the cell is part of the original puzzle
-    if puzzle_board[row][col] != 0:
+    if game_log.is_given(row, col):
         return jsonify({'error': 'Cannot change pre-filled numbers of the puzzle.'}), 400
 
-    current_board[row][col] = num
-    session['current_board'] = current_board # Update session
+    if game_log.cell(row, col) != num: # Don't log no-op moves
+        game_log.fill(row, col, num)
+        save_game_log(game_log) # Update session
 
     return jsonify({
         'message': f'Cell ({row+1}, {col+1}) updated to {num if num != 0 else "empty"}.',
-        'current_board': current_board
+        'current_board': game_log.board(),
+        'can_undo': game_log.can_undo(),
+        'can_redo': game_log.can_redo()
+    }), 200
+
+def _step_history(step):
+    """Shared implementation of undo/redo: `step` is GameLog.undo or GameLog.redo."""
+    if not session.get('game_active'):
+        return jsonify({'error': 'No active game.'}), 400
+
+    game_log = get_user_game().get('game_log')
+    if game_log is None:
+        return jsonify({'error': 'Game state not found in session.'}), 500
+
+    changed = step(game_log)
+    if changed is not None:
+        save_game_log(game_log)
+
+    return jsonify({
+        'cell': {'row': changed[0], 'col': changed[1], 'value': changed[2]} if changed else None,
+        'current_board': game_log.board(),
+        'can_undo': game_log.can_undo(),
+        'can_redo': game_log.can_redo()
     }), 200
 
-@app.route('/api/check_game', methods=['GET'])
+@bp.route('/api/undo', methods=['POST'])
+def undo_api():
+    return _step_history(GameLog.undo)
+
+@bp.route('/api/redo', methods=['POST'])
+def redo_api():
+    return _step_history(GameLog.redo)
+
+@bp.route('/api/check_game', methods=['GET'])
 def check_game_api():
     if not session.get('game_active'):
         return jsonify({'error': 'No active game.'}), 400
 
     game_state = get_user_game()
-    current_board = game_state.get('current_board')
+    game_log = game_state.get('game_log')
     solution_board = game_state.get('solution_board')
 
-    if current_board is None or solution_board is None:
+    if game_log is None or solution_board is None:
          return jsonify({'error': 'Game state not found in session.'}), 500
 
+    current_board = game_log.board()
     is_filled = all(all(cell != 0 for cell in row) for row in current_board)
     is_correct = check_sudoku_win(current_board, solution_board)
 
     if is_correct:
+        time_taken = None
+        if not session.get('score_recorded') and session.get('started_at'):
+            # Record each game only once, however many times it is checked. Like a revealed
+            # solution, a board finished with hints doesn't go on the leaderboard.
+            time_taken = int(time.time() - session['started_at'])
+            if not session.get('hints_used'):
+                record_score(session.get('player_name', DEFAULT_PLAYER_NAME), game_state['difficulty'], time_taken,
+                             source='web', game_id=session.get('game_id'))
+            session['score_recorded'] = True
+
         return jsonify({
             'is_solved': True,
             'is_filled': True,
+            'time_taken': time_taken,
             'message': 'تبریک! شما سودوکو را حل کردید!'
         }), 200
     else:
@@ -159,37 +269,127 @@ def check_game_api():
         }), 200
 
 
-@app.route('/api/solve_game', methods=['GET'])
+@bp.route('/api/solve_game', methods=['GET'])
 def solve_game_api():
     if not session.get('game_active'):
         return jsonify({'error': 'No active game.'}), 400
 
     game_state = get_user_game()
+    game_log = game_state.get('game_log')
     solution_board = game_state.get('solution_board')
 
-    if solution_board is None:
+    if game_log is None or solution_board is None:
         return jsonify({'error': 'Solution not found in session.'}), 500
 
-    # Update current board in session to the solution
-    session['current_board'] = [row[:] for row in solution_board]
+    # Update current board in session to the solution, one logged move per changed cell
+    fill_with_solution(game_log, solution_board)
+    save_game_log(game_log)
+    session['score_recorded'] = True # A revealed solution doesn't count as a win
 
     return jsonify({
         'message': 'Showing solution.',
         'current_board': solution_board # Send the solved board
         }), 200
 
-@app.route('/api/hint', methods=['GET'])
+def _sse(event, data):
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@bp.route('/api/solve_stream', methods=['GET'])
+def solve_stream_api():
+    """
+    Streams the solver's steps on the player's current board as Server-Sent Events.
+    The solver is a generator, so each step is computed only when the previous one has been
+    sent: a slow client slows the solver down instead of steps piling up in memory.
+    """
+    if not session.get('game_active'):
+        return jsonify({'error': 'No active game.'}), 400
+
+    game_state = get_user_game()
+    game_log = game_state.get('game_log')
+    solution_board = game_state.get('solution_board')
+
+    if game_log is None or solution_board is None:
+        return jsonify({'error': 'Game state not found in session.'}), 500
+
+    try:
+        speed = float(request.args.get('speed', SOLVE_STREAM_MAX_STEPS_PER_SECOND))
+    except ValueError:
+        speed = SOLVE_STREAM_MAX_STEPS_PER_SECOND
+    if not math.isfinite(speed): # 'nan' would slip past the clamp below and disable the rate limit
+        speed = SOLVE_STREAM_MAX_STEPS_PER_SECOND
+    speed = min(max(speed, 1), SOLVE_STREAM_MAX_STEPS_PER_SECOND)
+
+    # Checked before touching the session, so a refused stream leaves the game as it was
+    if not _solve_stream_slots.acquire(blocking=False):
+        return jsonify({'error': 'Too many solvers running, please try again shortly.'}), 503, {'Retry-After': '5'}
+
+    # Start from the player's board, minus entries that contradict the solution; the solver
+    # would otherwise have to exhaust the whole search tree to prove them wrong.
+    board = game_log.board()
+    wrong_cells = [(r_idx, c_idx) for r_idx in range(SIDE) for c_idx in range(SIDE)
+                   if board[r_idx][c_idx] != 0 and board[r_idx][c_idx] != solution_board[r_idx][c_idx]]
+    for r_idx, c_idx in wrong_cells:
+        board[r_idx][c_idx] = 0
+
+    # Like solve_game, this ends the game with the solution. Save it now: the session
+    # cookie can't change once the stream has started.
+    fill_with_solution(game_log, solution_board)
+    save_game_log(game_log)
+    session['score_recorded'] = True # A revealed solution doesn't count as a win
+
+    def generate():
+        steps = itertools.chain((('remove', r_idx, c_idx, 0) for r_idx, c_idx in wrong_cells),
+                                solve_sudoku_steps(board))
+        interval = 1.0 / speed
+        deadline = time.monotonic() + SOLVE_STREAM_MAX_SECONDS
+        next_at = time.monotonic()
+        count = 0
+        truncated = False
+
+        for action, row, col, num in steps:
+            now = time.monotonic()
+            if now >= deadline:
+                truncated = True
+                break
+            # Rate limit; after a stall (slow client), continue at the normal pace rather than bursting
+            next_at = max(next_at, now)
+            if next_at > now:
+                time.sleep(next_at - now)
+            next_at += interval
+            count += 1
+            yield _sse('step', {'action': action, 'row': row, 'col': col, 'num': num})
+
+        solved = not truncated and all(all(cell != 0 for cell in row) for row in board)
+        yield _sse('done', {
+            'solved': solved,
+            'truncated': truncated,
+            'steps': count,
+            'current_board': board if solved else solution_board
+        })
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no' # Don't let a proxy buffer the stream
+    })
+    # The server closes the response when the stream ends or the client goes away, even if
+    # the generator never started, so the slot is always given back exactly once.
+    response.call_on_close(_solve_stream_slots.release)
+    return response
+
+@bp.route('/api/hint', methods=['GET'])
 def hint_api():
     if not session.get('game_active'):
         return jsonify({'error': 'No active game.'}), 400
 
     game_state = get_user_game()
-    current_board = game_state.get('current_board')
+    game_log = game_state.get('game_log')
     solution_board = game_state.get('solution_board')
 
-    if current_board is None or solution_board is None:
+    if game_log is None or solution_board is None:
         return jsonify({'error': 'Game state not found in session.'}), 500
 
+    current_board = game_log.board()
     empty_cells = []
     for r_idx in range(SIDE):
         for c_idx in range(SIDE):
@@ -204,20 +404,51 @@ def hint_api():
     row, col = hint_cell_info['row'], hint_cell_info['col']
     hint_value = solution_board[row][col]
 
-    current_board[row][col] = hint_value
-    session['current_board'] = current_board
+    game_log.fill(row, col, hint_value)
+    save_game_log(game_log)
+    session['hints_used'] = session.get('hints_used', 0) + 1
 
     return jsonify({
         'message': f'راهنمایی: مقدار خانه ({row+1}, {col+1}) عدد {hint_value} است.',
         'hint': {'row': row, 'col': col, 'value': hint_value},
-        'current_board': current_board
+        'current_board': game_log.board(),
+        'can_undo': game_log.can_undo(),
+        'can_redo': game_log.can_redo()
+    }), 200
+
+
+@bp.route('/api/leaderboard', methods=['GET'])
+def leaderboard_api():
+    difficulty = request.args.get('difficulty', 'easy').lower()
+    if difficulty not in DIFFICULTIES:
+        return jsonify({'error': 'Invalid difficulty.'}), 400
+
+    return jsonify({
+        'difficulty': difficulty,
+        'leaderboard': get_leaderboard(difficulty)
+    }), 200
+
+
+@bp.route('/api/ready', methods=['GET'])
+def ready_api():
+    """Readiness probe: the app is built and the scores database is reachable."""
+    try:
+        get_db_connection().execute('SELECT 1')
+    except Exception as e:
+        return jsonify({'ready': False, 'error': str(e)}), 503
+
+    return jsonify({
+        'ready': True,
+        'pid': os.getpid(),
+        'startup_seconds': current_app.config.get('STARTUP_SECONDS'),
+        'puzzle_pool': current_app.extensions['puzzle_pool'].sizes()
     }), 200
 
 
 # --- Route for serving the main HTML page ---
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html') # Will be created later
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
+    create_app().run(debug=True, port=5001)
@@ -6,17 +6,20 @@ document.addEventListener('DOMContentLoaded', () => {
     let initialPuzzle = []; // The original puzzle, to identify pre-filled cells
     // let solutionBoard = []; // Not strictly needed to store globally on client if backend handles it
     let selectedCell = null; // { row, col, element }
-    let undoStack = []; // For undo functionality
+    let canUndo = false; // Undo history lives in the server-side move log
     let timerInterval = null;
     let timerSeconds = 0;
+    let solveStream = null; // EventSource while the "watch it solve" animation runs
 
     // DOM Elements
     const boardContainer = document.getElementById('sudoku-board-container');
     const numbersPanel = document.getElementById('numbers-panel');
     const newGameBtn = document.getElementById('new-game-btn');
     const difficultySelect = document.getElementById('difficulty');
+    const playerNameInput = document.getElementById('player-name');
     const checkBtn = document.getElementById('check-btn');
     const solveBtn = document.getElementById('solve-btn');
+    const watchSolveBtn = document.getElementById('watch-solve-btn');
     const hintBtn = document.getElementById('hint-btn');
     const undoBtn = document.getElementById('undo-btn');
     const messageArea = document.getElementById('message-area');
@@ -62,15 +65,20 @@ document.addEventListener('DOMContentLoaded', () => {
     function toggleActionButtons(disabled) {
         checkBtn.disabled = disabled;
         solveBtn.disabled = disabled;
+        watchSolveBtn.disabled = disabled;
         hintBtn.disabled = disabled;
-        undoBtn.disabled = disabled || undoStack.length === 0;
+        undoBtn.disabled = disabled || !canUndo;
     }
 
     // --- Timer Functions ---
     function startTimer() {
-        stopTimer();
         timerSeconds = 0;
         updateTimerDisplay();
+        resumeTimer();
+    }
+
+    function resumeTimer() {
+        stopTimer();
         timerInterval = setInterval(() => {
             timerSeconds++;
             updateTimerDisplay();
@@ -89,24 +97,26 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // --- Undo Functionality ---
-    function pushToUndoStack(row, col, oldValue, newValue) {
-        undoStack.push({ row, col, oldValue, newValue });
-        undoBtn.disabled = false;
+    function setCanUndo(value) {
+        canUndo = !!value;
+        undoBtn.disabled = !canUndo;
     }
 
-    function handleUndo() {
-        if (undoStack.length === 0) return;
-        const lastAction = undoStack.pop();
+    async function handleUndo() {
+        if (!canUndo) return;
+        undoBtn.disabled = true; // Avoid double undo while the request is in flight
 
-        currentBoard[lastAction.row][lastAction.col] = lastAction.oldValue;
-        updateCellOnBoard(lastAction.row, lastAction.col, lastAction.oldValue);
-
-        if (selectedCell && selectedCell.row === lastAction.row && selectedCell.col === lastAction.col) {
-            selectedCell.element.querySelector('input').value = lastAction.oldValue !== 0 ? lastAction.oldValue : '';
-        }
-        // showMessage(`حرکت قبلی بازگردانده شد.`, 'info');
-        if (undoStack.length === 0) {
-            undoBtn.disabled = true;
+        const data = await fetchAPI('/api/undo', 'POST');
+        if (data) {
+            if (data.cell) {
+                const { row, col, value } = data.cell;
+                currentBoard[row][col] = value;
+                updateCellOnBoard(row, col, value);
+            }
+            // showMessage(`حرکت قبلی بازگردانده شد.`, 'info');
+            setCanUndo(data.can_undo);
+        } else {
+            setCanUndo(canUndo);
         }
     }
 
@@ -259,8 +269,6 @@ document.addEventListener('DOMContentLoaded', () => {
              selectedCell.element.querySelector('input').value = num !== 0 ? num : '';
         }
 
-        pushToUndoStack(row, col, oldValue, num);
-
         const response = await fetchAPI('/api/fill_cell', 'POST', { row, col, num });
         if (response) {
             if (response.error) {
@@ -269,13 +277,10 @@ document.addEventListener('DOMContentLoaded', () => {
                  if (selectedCell && selectedCell.row === row && selectedCell.col === col) {
                     selectedCell.element.querySelector('input').value = oldValue !== 0 ? oldValue : '';
                 }
-                if(undoStack.length > 0 && undoStack[undoStack.length-1].row === row && undoStack[undoStack.length-1].col === col && undoStack[undoStack.length-1].newValue === num) {
-                    undoStack.pop();
-                    if(undoStack.length === 0) undoBtn.disabled = true;
-                }
                 showMessage(response.error, 'error');
             } else {
                 currentBoard = response.current_board; // Ensure client board is in sync with server's perspective
+                setCanUndo(response.can_undo);
                 clearMessage();
             }
         } else { // Network or other major error
@@ -284,25 +289,23 @@ document.addEventListener('DOMContentLoaded', () => {
             if (selectedCell && selectedCell.row === row && selectedCell.col === col) {
                  selectedCell.element.querySelector('input').value = oldValue !== 0 ? oldValue : '';
             }
-            if(undoStack.length > 0 && undoStack[undoStack.length-1].row === row && undoStack[undoStack.length-1].col === col && undoStack[undoStack.length-1].newValue === num) {
-                undoStack.pop();
-                 if(undoStack.length === 0) undoBtn.disabled = true;
-            }
         }
     }
 
     // --- Game Actions ---
     async function handleNewGame() {
+        stopSolveStream();
         stopTimer();
         const difficulty = difficultySelect.value;
+        const playerName = playerNameInput.value.trim(); // Shown on the leaderboard; empty means guest
+        localStorage.setItem('playerName', playerName);
         showMessage('در حال ایجاد بازی جدید...', 'info');
         toggleActionButtons(true); // Disable buttons during load
         newGameBtn.disabled = true; // Disable new game btn itself too
-        undoStack = [];
-        undoBtn.disabled = true;
+        setCanUndo(false);
         selectedCell = null;
 
-        const data = await fetchAPI('/api/new_game', 'POST', { difficulty });
+        const data = await fetchAPI('/api/new_game', 'POST', { difficulty, player_name: playerName });
         newGameBtn.disabled = false; // Re-enable new game btn
         if (data && data.puzzle_board) {
             renderBoard(data.current_board, data.puzzle_board);
@@ -312,7 +315,6 @@ document.addEventListener('DOMContentLoaded', () => {
         } else {
             showMessage('خطا در شروع بازی جدید. لطفاً دوباره تلاش کنید.', 'error');
             toggleActionButtons(false); // Re-enable if failed, except undo
-            undoBtn.disabled = true;
         }
     }
 
@@ -341,23 +343,83 @@ document.addEventListener('DOMContentLoaded', () => {
             renderBoard(data.current_board, initialPuzzle);
             showMessage('راه‌حل نمایش داده شد.', 'success');
             stopTimer();
+            setCanUndo(false); // Game is over/solved
             toggleActionButtons(true);
-            undoStack = []; // Clear undo stack as game is over/solved
         } else {
             showMessage('خطا در دریافت راه‌حل.', 'error');
         }
     }
 
+    // --- Watch it solve (Server-Sent Events) ---
+    function stopSolveStream() {
+        if (solveStream) {
+            solveStream.close();
+            solveStream = null;
+        }
+        boardContainer.querySelectorAll('.solver-place, .solver-deduce, .solver-remove')
+            .forEach(cell => cell.classList.remove('solver-place', 'solver-deduce', 'solver-remove'));
+    }
+
+    function handleWatchSolve() {
+        if (!confirm('آیا مطمئن هستید که می‌خواهید حل جدول را تماشا کنید؟ بازی فعلی شما تمام می‌شود.')) {
+            return;
+        }
+        stopSolveStream();
+        stopTimer();
+        const couldUndo = canUndo;
+        setCanUndo(false);
+        toggleActionButtons(true);
+        showMessage('در حال حل جدول...', 'info');
+
+        let lastCell = null;
+        let started = false;
+        solveStream = new EventSource('/api/solve_stream');
+
+        solveStream.addEventListener('step', (event) => {
+            started = true;
+            const { action, row, col, num } = JSON.parse(event.data);
+            currentBoard[row][col] = num;
+            updateCellOnBoard(row, col, num);
+            if (lastCell) {
+                lastCell.classList.remove('solver-place', 'solver-deduce', 'solver-remove');
+            }
+            lastCell = boardContainer.querySelector(`.sudoku-cell[data-row='${row}'][data-col='${col}']`);
+            if (lastCell) {
+                lastCell.classList.add(`solver-${action}`);
+            }
+        });
+
+        solveStream.addEventListener('done', (event) => {
+            const data = JSON.parse(event.data);
+            stopSolveStream(); // Close before the server ends the stream, or EventSource would reconnect
+            renderBoard(data.current_board, initialPuzzle);
+            showMessage(data.truncated ? 'حل جدول طولانی شد؛ راه‌حل کامل نمایش داده شد.' : `جدول در ${data.steps} گام حل شد.`, 'success');
+        });
+
+        solveStream.onerror = () => {
+            if (!solveStream) return;
+            stopSolveStream();
+            if (!started) {
+                // Refused before anything was sent (e.g. the server is busy): the game goes on
+                setCanUndo(couldUndo);
+                toggleActionButtons(false);
+                resumeTimer();
+                showMessage('سرور مشغول است، لطفاً کمی بعد دوباره تلاش کنید.', 'error');
+                return;
+            }
+            showMessage('خطا در دریافت مراحل حل.', 'error');
+        };
+    }
+
     async function handleHint() {
         showMessage('در حال دریافت راهنمایی...', 'info');
         const data = await fetchAPI('/api/hint', 'GET');
         if (data) {
             if (data.hint) {
                 const { row, col, value } = data.hint;
-                const oldValue = currentBoard[row][col];
                 currentBoard[row][col] = value; // Update client model
                 updateCellOnBoard(row, col, value, true);
-                pushToUndoStack(row, col, oldValue, value);
+                setCanUndo(data.can_undo);
                 showMessage(data.message, 'info');
 
                 // Check if board is now solved after hint
@@ -378,9 +440,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // --- Initialization ---
     function init() {
+        playerNameInput.value = localStorage.getItem('playerName') || '';
         newGameBtn.addEventListener('click', handleNewGame);
         checkBtn.addEventListener('click', handleCheckGame);
         solveBtn.addEventListener('click', handleSolveGame);
+        watchSolveBtn.addEventListener('click', handleWatchSolve);
         hintBtn.addEventListener('click', handleHint);
         undoBtn.addEventListener('click', handleUndo);
 